@@ -7,15 +7,24 @@ from page_predictor.errors import (
     LatexTimeoutError,
     PagePredictorError,
     PdfReadError,
+    WorkerUnavailableError,
 )
+from page_predictor.executor import Executor, LocalExecutor, PoolExecutor
+from page_predictor.remote import CompileWorker, RemoteExecutor
 
 __all__ = [
     "count_pages",
     "optimize_to_fit",
     "CompilationConfig",
     "LatexEngine",
+    "Executor",
+    "LocalExecutor",
+    "PoolExecutor",
+    "RemoteExecutor",
+    "CompileWorker",
     "PagePredictorError",
     "LatexCompilationError",
     "PdfReadError",
     "LatexTimeoutError",
+    "WorkerUnavailableError",
 ]
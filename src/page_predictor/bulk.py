@@ -0,0 +1,388 @@
+"""Bulk page counting for PDFs that already exist on disk.
+
+Files are counted on a thread pool with quick_count_pdf_pages(), and
+results are streamed back as they complete. A PageIndex remembers the
+count for each (path, size, mtime) so re-runs only touch changed files.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from page_predictor.errors import PdfReadError
+from page_predictor.pdf_reader import quick_count_pdf_pages
+
+_INDEX_VERSION = 1
+
+# Records between automatic index saves, so a killed run keeps its progress
+_DEFAULT_CHECKPOINT_EVERY = 10_000
+
+
+@dataclass(frozen=True)
+class PageCountResult:
+    """Outcome of counting one file.
+
+    Exactly one of ``pages`` and ``error`` is set. ``cached`` is True when
+    the count came from the index without opening the file.
+    """
+
+    path: Path
+    pages: Optional[int] = None
+    error: Optional[str] = None
+    cached: bool = False
+
+
+class PageIndex:
+    """Persistent page counts keyed by (path, size, mtime).
+
+    Stored as a single JSON file. Lookups and records are thread-safe.
+    With an ``index_path``, checkpoint() saves once ``checkpoint_every``
+    new records have accumulated (0 disables this); call save() at the
+    end of a run to write the rest.
+    """
+
+    def __init__(
+        self,
+        index_path: Optional[Path] = None,
+        checkpoint_every: int = _DEFAULT_CHECKPOINT_EVERY,
+    ):
+        self.index_path = index_path
+        self.checkpoint_every = checkpoint_every
+        self._entries: dict[str, tuple[int, int, int]] = {}
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._unsaved = 0
+
+    @classmethod
+    def load(
+        cls,
+        index_path: Path,
+        checkpoint_every: int = _DEFAULT_CHECKPOINT_EVERY,
+    ) -> "PageIndex":
+        """Load an index, starting empty if the file does not exist yet.
+
+        An index that cannot be used (truncated by a crash, malformed, or
+        written by another version) is discarded with a warning, so the
+        run simply recounts everything.
+        """
+        index = cls(index_path, checkpoint_every)
+        try:
+            data = json.loads(index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return index
+        except ValueError as e:
+            warnings.warn(f"Ignoring unreadable page index {index_path}: {e}")
+            return index
+
+        try:
+            index._entries = _parse_index(data)
+        except ValueError as e:
+            warnings.warn(f"Ignoring page index {index_path}: {e}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, path: str, size: int, mtime_ns: int) -> Optional[int]:
+        """Return the recorded page count if the file is unchanged.
+
+        Also marks the path as seen, which protects it from prune().
+        """
+        with self._lock:
+            self._seen.add(path)
+            entry = self._entries.get(path)
+        if entry is not None and entry[:2] == (size, mtime_ns):
+            return entry[2]
+        return None
+
+    def record(self, path: str, size: int, mtime_ns: int, pages: int) -> None:
+        with self._lock:
+            self._entries[path] = (size, mtime_ns, pages)
+            self._seen.add(path)
+            self._dirty = True
+            self._unsaved += 1
+
+    def checkpoint(self) -> None:
+        """Save if enough new records have accumulated since the last save.
+
+        A failed save is reported as a warning rather than raised, so a
+        long run keeps going and tries again at the next checkpoint.
+        """
+        with self._lock:
+            due = (
+                self.index_path is not None
+                and self.checkpoint_every > 0
+                and self._unsaved >= self.checkpoint_every
+            )
+        if not due:
+            return
+        try:
+            self.save()
+        except OSError as e:
+            warnings.warn(f"Could not checkpoint page index {self.index_path}: {e}")
+
+    def prune(self, roots: Iterable[Path]) -> int:
+        """Drop entries below any of roots that were not seen this run.
+
+        Call after a run that walked each root completely, so that files
+        deleted since the last run leave the index. Returns the number of
+        entries removed.
+        """
+        prefixes = tuple(os.path.join(os.path.abspath(r), "") for r in roots)
+        with self._lock:
+            stale = [
+                path
+                for path in self._entries
+                if path.startswith(prefixes) and path not in self._seen
+            ]
+            for path in stale:
+                del self._entries[path]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def save(self) -> None:
+        """Atomically write the index to ``index_path`` if it changed."""
+        if self.index_path is None:
+            raise ValueError("PageIndex has no index_path to save to")
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {"version": _INDEX_VERSION, "entries": dict(self._entries)}
+                self._dirty = False
+                self._unsaved = 0
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            try:
+                tmp_path.write_text(json.dumps(data), encoding="utf-8")
+                os.replace(tmp_path, self.index_path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+
+def _parse_index(data: object) -> dict[str, tuple[int, int, int]]:
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    if data.get("version") != _INDEX_VERSION:
+        raise ValueError(f"unsupported version {data.get('version')!r}")
+    entries = data.get("entries")
+    if not isinstance(entries, dict):
+        raise ValueError("'entries' must be an object")
+
+    parsed = {}
+    for path, entry in entries.items():
+        if not (
+            isinstance(entry, list)
+            and len(entry) == 3
+            and all(type(value) is int for value in entry)
+        ):
+            raise ValueError(f"malformed entry for {path!r}")
+        parsed[path] = (entry[0], entry[1], entry[2])
+    return parsed
+
+
+def iter_pdf_files(
+    root: Path, onerror: Optional[Callable[[OSError], None]] = None
+) -> Iterator[Path]:
+    """Yield every *.pdf file below root, without following directory symlinks.
+
+    Directories that cannot be read are skipped. Pass ``onerror`` to learn
+    about them, e.g. before treating the walk as complete.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                        yield Path(entry.path)
+        except OSError as e:
+            if onerror is not None:
+                onerror(e)
+
+
+def read_manifest(manifest_path: Path) -> Iterator[Path]:
+    """Yield paths listed one per line in a manifest file.
+
+    Blank lines and lines starting with '#' are skipped. Relative paths
+    are resolved against the manifest's directory.
+    """
+    base = manifest_path.parent
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield base / line
+
+
+def count_pdf_pages_bulk(
+    paths: Iterable[Path],
+    index: Optional[PageIndex] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[PageCountResult]:
+    """Count pages for many PDFs in parallel, yielding results as they finish.
+
+    Paths are consumed lazily, so generators such as iter_pdf_files() can
+    feed directory trees of any size. Per-file failures are reported in
+    the result rather than raised.
+
+    Args:
+        paths: PDF files to count.
+        index: Optional index consulted before and updated after counting,
+            and checkpointed as results are collected.
+        max_workers: Thread pool size. Defaults to the same size
+            ThreadPoolExecutor would pick.
+
+    Yields:
+        One PageCountResult per path, in completion order.
+    """
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+    # Bound the number of queued jobs so huge inputs are not
+    # materialized up front
+    window = max_workers * 4
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending: set[Future[PageCountResult]] = set()
+        try:
+            for path in paths:
+                pending.add(pool.submit(_count_one, Path(path), index))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from _collect(done, index)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from _collect(done, index)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _collect(
+    done: Iterable[Future[PageCountResult]], index: Optional[PageIndex]
+) -> Iterator[PageCountResult]:
+    # Checkpoints run here, on the consuming thread, so a slow or failing
+    # save never happens inside a pool worker
+    for future in done:
+        result = future.result()
+        if index is not None:
+            index.checkpoint()
+        yield result
+
+
+def _count_one(path: Path, index: Optional[PageIndex]) -> PageCountResult:
+    key = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        return PageCountResult(path, error=f"{type(e).__name__}: {e}")
+
+    if index is not None:
+        pages = index.lookup(key, stat.st_size, stat.st_mtime_ns)
+        if pages is not None:
+            return PageCountResult(path, pages=pages, cached=True)
+
+    try:
+        pages = quick_count_pdf_pages(path)
+    except PdfReadError as e:
+        return PageCountResult(path, error=str(e))
+
+    if index is not None:
+        index.record(key, stat.st_size, stat.st_mtime_ns, pages)
+    return PageCountResult(path, pages=pages)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Count pages of existing PDFs: ``python -m page_predictor.bulk``.
+
+    Prints one tab-separated "path<TAB>pages" line per file as results
+    arrive; failures and unreadable directories go to stderr. Returns 1
+    if any file failed or any directory could not be read.
+    """
+    parser = argparse.ArgumentParser(
+        description="Count pages of PDF files in directory trees or a manifest."
+    )
+    parser.add_argument("roots", nargs="*", type=Path, help="Directories or PDF files")
+    parser.add_argument(
+        "--manifest", type=Path, help="File listing one PDF path per line"
+    )
+    parser.add_argument(
+        "--index", type=Path, help="Index file used to skip unchanged files"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Thread pool size")
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=_DEFAULT_CHECKPOINT_EVERY,
+        metavar="N",
+        help="Save the index after every N newly counted files (0 disables)",
+    )
+    args = parser.parse_args(argv)
+    if not args.roots and args.manifest is None:
+        parser.error("give at least one directory, file or --manifest")
+
+    index = (
+        PageIndex.load(args.index, args.checkpoint_every) if args.index else None
+    )
+    failed = False
+    incomplete_roots: set[Path] = set()
+
+    def report_walk_error(root: Path, error: OSError) -> None:
+        incomplete_roots.add(root)
+        print(f"{error.filename}\t{type(error).__name__}: {error}", file=sys.stderr)
+
+    try:
+        for result in count_pdf_pages_bulk(
+            _iter_inputs(args.roots, args.manifest, report_walk_error),
+            index,
+            args.workers,
+        ):
+            if result.error is None:
+                print(f"{result.path}\t{result.pages}")
+            else:
+                failed = True
+                print(f"{result.path}\t{result.error}", file=sys.stderr)
+        if index is not None:
+            # Directory roots walked without errors have been seen in full,
+            # so anything under them that was not seen has been deleted
+            index.prune(
+                root
+                for root in args.roots
+                if root.is_dir() and root not in incomplete_roots
+            )
+    finally:
+        if index is not None:
+            index.save()
+    return 1 if failed or incomplete_roots else 0
+
+
+def _iter_inputs(
+    roots: Sequence[Path],
+    manifest: Optional[Path],
+    on_walk_error: Callable[[Path, OSError], None],
+) -> Iterator[Path]:
+    for root in roots:
+        if root.is_dir():
+            yield from iter_pdf_files(root, lambda e, root=root: on_walk_error(root, e))
+        else:
+            yield root
+    if manifest is not None:
+        yield from read_manifest(manifest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,27 @@
 """Core public API: count_pages() and future optimize_to_fit() stub."""
 
-import tempfile
-from pathlib import Path
-
-from page_predictor.compiler import compile_latex
 from page_predictor.config import CompilationConfig
-from page_predictor.pdf_reader import count_pdf_pages
+from page_predictor.executor import Executor, LocalExecutor
 
 
 def count_pages(
     latex_source: str,
     config: CompilationConfig | None = None,
+    executor: Executor | None = None,
 ) -> int:
     """Count the number of pages a LaTeX document will produce.
 
     Compiles the LaTeX source to PDF in a temporary directory, extracts
-    the page count, and cleans up all temporary files.
+    the page count, and cleans up all temporary files. Where compilation
+    happens is decided by the executor backend.
 
     Args:
         latex_source: A complete LaTeX document string (must include
             \\documentclass, \\begin{document}, etc.).
         config: Optional compilation configuration. Defaults to pdflatex
             with a 30-second timeout.
+        executor: Optional compilation backend (LocalExecutor,
+            PoolExecutor, RemoteExecutor). Defaults to a local subprocess.
 
     Returns:
         The number of pages in the compiled PDF.
@@ -30,15 +30,14 @@ def count_pages(
         LatexCompilationError: If the LaTeX source fails to compile.
         PdfReadError: If the page count cannot be extracted.
         LatexTimeoutError: If compilation exceeds the timeout.
+        WorkerUnavailableError: If a RemoteExecutor has no usable worker.
     """
     if config is None:
         config = CompilationConfig()
+    if executor is None:
+        executor = LocalExecutor()
 
-    with tempfile.TemporaryDirectory(prefix="page_predictor_") as tmpdir:
-        work_dir = Path(tmpdir)
-        pdf_path = compile_latex(latex_source, config, work_dir)
-        log_path = work_dir / "document.log"
-        return count_pdf_pages(pdf_path, log_path)
+    return executor.execute(latex_source, config)
 
 
 # ──────────────────────────────────────────────────────────────
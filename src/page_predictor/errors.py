@@ -31,3 +31,12 @@ class LatexTimeoutError(PagePredictorError):
         super().__init__(
             f"LaTeX compilation timed out after {timeout_seconds} seconds"
         )
+
+    def __reduce__(self):
+        # Rebuild from timeout_seconds so the error survives pickling
+        # across process pool boundaries with its message intact.
+        return (type(self), (self.timeout_seconds,))
+
+
+class WorkerUnavailableError(PagePredictorError):
+    """Raised when no remote compile worker could complete a job."""
@@ -0,0 +1,88 @@
+"""Pluggable backends that turn LaTeX source into a page count.
+
+Every backend implements the Executor protocol: take a LaTeX string and
+a CompilationConfig, return the page count, and raise the same
+exceptions as count_pages(). Local backends live here; the remote TCP
+backend lives in page_predictor.remote.
+"""
+
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Protocol
+
+from page_predictor.compiler import compile_latex
+from page_predictor.config import CompilationConfig
+from page_predictor.pdf_reader import count_pdf_pages
+
+
+class Executor(Protocol):
+    """Protocol for compilation backends used by count_pages()."""
+
+    def execute(self, latex_source: str, config: CompilationConfig) -> int:
+        """Compile the source and return the number of pages."""
+        ...
+
+
+def compile_and_count(latex_source: str, config: CompilationConfig) -> int:
+    """Compile in an isolated temp directory and count the pages.
+
+    Module-level so it can be pickled into process pool workers.
+    """
+    with tempfile.TemporaryDirectory(prefix="page_predictor_") as tmpdir:
+        work_dir = Path(tmpdir)
+        pdf_path = compile_latex(latex_source, config, work_dir)
+        log_path = work_dir / "document.log"
+        return count_pdf_pages(pdf_path, log_path)
+
+
+class LocalExecutor:
+    """Compile with a TeX subprocess in the calling process (the default)."""
+
+    def execute(self, latex_source: str, config: CompilationConfig) -> int:
+        return compile_and_count(latex_source, config)
+
+
+class PoolExecutor:
+    """Compile in a pool of local worker processes.
+
+    The pool is created lazily on first use and reused across calls, so
+    concurrent callers (e.g. threads) can keep several TeX processes busy.
+    Use as a context manager or call close() to shut the pool down.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def execute(self, latex_source: str, config: CompilationConfig) -> int:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            pool = self._pool
+        try:
+            return pool.submit(compile_and_count, latex_source, config).result()
+        except BrokenProcessPool:
+            # A worker process died; the pool can never recover, so drop it
+            # and let the next call start a fresh one.
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            raise
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __enter__(self) -> "PoolExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
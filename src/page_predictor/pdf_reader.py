@@ -1,5 +1,6 @@
 """PDF page count extraction with multiple fallback strategies."""
 
+import mmap
 import re
 from pathlib import Path
 from typing import Optional
@@ -9,10 +10,38 @@ from page_predictor.errors import PdfReadError
 # Matches pdflatex log: "Output written on doc.pdf (N page(s), M bytes)."
 _LOG_PATTERN = re.compile(r"Output written on .+\((\d+) pages?\,")
 
-# Matches root /Pages object with /Count in raw PDF bytes
-_PDF_PAGES_PATTERN = re.compile(
-    rb"/Type\s*/Pages\b.*?/Count\s+(\d+)", re.DOTALL
-)
+# Matches the catalog reference in a trailer: "/Root 1 0 R"
+_PDF_ROOT_REF_PATTERN = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R\b")
+
+# Matches the page tree reference in the catalog: "/Pages 2 0 R"
+_PDF_PAGES_REF_PATTERN = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R\b")
+
+# Matches the /Count entry inside a page tree object
+_PDF_COUNT_PATTERN = re.compile(rb"/Count\s+(\d+)")
+
+# Matches the pointer to the last cross-reference section
+_PDF_STARTXREF_PATTERN = re.compile(rb"startxref\s+(\d+)")
+
+# Matches an object header at a known offset: "12 0 obj"
+_PDF_OBJ_HEADER_PATTERN = re.compile(rb"\s*(\d+)\s+\d+\s+obj\b")
+
+# Matches a cross-reference subsection header: "first count" on its own line
+_PDF_XREF_SUBSECTION_PATTERN = re.compile(rb"\s*(\d+) (\d+)[ \t]*(?:\r\n|\r|\n)")
+
+# Matches one cross-reference entry, without its end-of-line marker
+_PDF_XREF_ENTRY_PATTERN = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+
+# Matches the start of the trailer that follows a cross-reference table
+_PDF_TRAILER_PATTERN = re.compile(rb"\s*trailer\s*<<")
+
+# Matches the pointer from a trailer to the previous cross-reference table
+_PDF_PREV_PATTERN = re.compile(rb"/Prev\s+(\d+)")
+
+# How far from the end of the file to look for startxref and the trailer
+_PDF_TAIL_BYTES = 1024
+
+# Upper bound on the size of a trailer dictionary
+_PDF_TRAILER_BYTES = 4096
 
 
 def count_pdf_pages(pdf_path: Path, log_path: Optional[Path] = None) -> int:
@@ -65,6 +94,37 @@ def count_pdf_pages(pdf_path: Path, log_path: Optional[Path] = None) -> int:
     raise PdfReadError("Could not determine page count")
 
 
+def quick_count_pdf_pages(pdf_path: Path) -> int:
+    """Count pages in a PDF using the cheapest strategy that succeeds.
+
+    The file is memory-mapped once. Files with a classic cross-reference
+    table are counted by following the trailer and table straight to the
+    page tree, touching only a few pages of the file. Files with
+    cross-reference streams, pdfTeX's default output, keep the page tree
+    in compressed object streams; they go straight to pypdf, which parses
+    the mapped file. That fallback is a full parse and much slower than
+    the raw lookup. Unlike count_pdf_pages(), results are not
+    cross-validated, which makes this suitable for bulk audits.
+
+    Raises:
+        PdfReadError: If no strategy can determine the page count.
+    """
+    count = None
+    try:
+        with open(pdf_path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            count = _count_from_page_tree(data)
+            if count is None:
+                count = _count_from_pypdf(data)
+    except (OSError, ValueError):
+        # ValueError: empty files cannot be memory-mapped
+        pass
+    if count is None:
+        raise PdfReadError(f"Could not determine page count from {pdf_path}")
+    return count
+
+
 def _count_from_log(log_path: Path) -> Optional[int]:
     """Extract page count from the TeX log file."""
     try:
@@ -80,26 +140,167 @@ def _count_from_log(log_path: Path) -> Optional[int]:
 def _count_from_pdf_binary(pdf_path: Path) -> Optional[int]:
     """Extract page count by parsing raw PDF bytes.
 
-    Finds /Type /Pages objects and reads /Count. The root node has the
-    highest count (child nodes hold subsets).
+    The file is memory-mapped rather than read into memory. See
+    _count_from_page_tree() for how the count is located.
     """
     try:
-        data = pdf_path.read_bytes()
-        matches = _PDF_PAGES_PATTERN.findall(data)
-        if matches:
-            counts = [int(m) for m in matches]
-            return max(counts)
+        with open(pdf_path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            return _count_from_page_tree(data)
     except (OSError, ValueError):
-        pass
+        # ValueError: empty files cannot be memory-mapped
+        return None
+
+
+def _count_from_page_tree(data: mmap.mmap) -> Optional[int]:
+    """Follow the last trailer's /Root to the page tree root and read /Count.
+
+    Only the end of the file, the cross-reference tables and the two
+    objects involved are read, so the cost does not grow with file size.
+    The tables map object numbers to offsets; when they cannot be used,
+    the last definition of the object is found with a reverse search.
+    Incremental updates append new trailers, tables and definitions of
+    changed objects, so following the newest ones gives the current page
+    tree.
+
+    Returns None for files with cross-reference streams (PDF 1.5+), whose
+    objects are normally compressed out of reach of the raw bytes.
+    """
+    tail_start = max(0, len(data) - _PDF_TAIL_BYTES)
+    startxref = _last_match(_PDF_STARTXREF_PATTERN, data, tail_start)
+    xref_offset = int(startxref.group(1)) if startxref else None
+    if xref_offset is not None and (
+        data[xref_offset : xref_offset + 4] != b"xref"
+        or data.find(b"/XRefStm", tail_start) != -1
+    ):
+        return None
+
+    root_ref = _last_match(_PDF_ROOT_REF_PATTERN, data, tail_start)
+    if root_ref is None:
+        return None
+    catalog = _object_span(data, int(root_ref.group(1)), xref_offset)
+    if catalog is None:
+        return None
+    pages_ref = _PDF_PAGES_REF_PATTERN.search(data, *catalog)
+    if pages_ref is None:
+        return None
+    page_tree = _object_span(data, int(pages_ref.group(1)), xref_offset)
+    if page_tree is None:
+        return None
+    count = _PDF_COUNT_PATTERN.search(data, *page_tree)
+    return int(count.group(1)) if count else None
+
+
+def _object_span(
+    data: mmap.mmap, number: int, xref_offset: Optional[int]
+) -> Optional[tuple[int, int]]:
+    """Byte range of the body of the current definition of an object."""
+    header = None
+    if xref_offset is not None:
+        offset = _lookup_xref(data, number, xref_offset)
+        if offset is not None:
+            header = _PDF_OBJ_HEADER_PATTERN.match(data, offset)
+            if header is not None and int(header.group(1)) != number:
+                header = None
+    if header is None:
+        header = _rfind_object_header(data, number)
+    if header is None:
+        return None
+    end = data.find(b"endobj", header.end())
+    if end == -1:
+        return None
+    return header.end(), end
+
+
+def _lookup_xref(data: mmap.mmap, number: int, xref_offset: int) -> Optional[int]:
+    """Offset of an object according to the cross-reference tables.
+
+    Starts at the newest table and follows /Prev links to older ones.
+    Returns None if the tables are malformed or do not list the object
+    as in use.
+    """
+    visited = set()
+    while xref_offset not in visited:
+        visited.add(xref_offset)
+        if data[xref_offset : xref_offset + 4] != b"xref":
+            return None
+        pos = xref_offset + 4
+        while subsection := _PDF_XREF_SUBSECTION_PATTERN.match(data, pos):
+            first, count = int(subsection.group(1)), int(subsection.group(2))
+            entries = subsection.end()
+            if count == 0:
+                pos = entries
+                continue
+            entry_length = _xref_entry_length(data, entries)
+            if entry_length is None:
+                return None
+            if first <= number < first + count:
+                start = entries + (number - first) * entry_length
+                entry = _PDF_XREF_ENTRY_PATTERN.match(data, start)
+                if entry is None or entry.group(3) != b"n":
+                    return None
+                return int(entry.group(1))
+            pos = entries + count * entry_length
+
+        trailer = _PDF_TRAILER_PATTERN.match(data, pos)
+        if trailer is None:
+            return None
+        prev = _PDF_PREV_PATTERN.search(
+            data, trailer.end(), trailer.end() + _PDF_TRAILER_BYTES
+        )
+        if prev is None:
+            return None
+        xref_offset = int(prev.group(1))
     return None
 
 
-def _count_from_pypdf(pdf_path: Path) -> Optional[int]:
-    """Extract page count using pypdf (if installed)."""
+def _xref_entry_length(data: mmap.mmap, pos: int) -> Optional[int]:
+    """Length of the entries in a subsection: 20 bytes, or 19 from sloppy writers."""
+    if _PDF_XREF_ENTRY_PATTERN.match(data, pos) is None:
+        return None
+    eol = data[pos + 18 : pos + 20]
+    if eol in (b" \r", b" \n", b"\r\n"):
+        return 20
+    if eol[:1] in (b"\r", b"\n"):
+        return 19
+    return None
+
+
+def _rfind_object_header(data: mmap.mmap, number: int) -> Optional[re.Match]:
+    """Find the last "N 0 obj" header with a literal reverse search."""
+    needle = b"%d 0 obj" % number
+    end = len(data)
+    while (pos := data.rfind(needle, 0, end)) != -1:
+        if pos == 0 or not data[pos - 1 : pos].isdigit():
+            return _PDF_OBJ_HEADER_PATTERN.match(data, pos)
+        end = pos + len(needle) - 1
+    return None
+
+
+def _last_match(
+    pattern: re.Pattern, data: mmap.mmap, pos: int = 0
+) -> Optional[re.Match]:
+    match = None
+    for match in pattern.finditer(data, pos):
+        pass
+    return match
+
+
+def _count_from_pypdf(source: Path | mmap.mmap) -> Optional[int]:
+    """Extract page count using pypdf (if installed).
+
+    Accepts a path or an already memory-mapped file, which pypdf reads
+    as a stream without opening the file again.
+    """
     try:
         from pypdf import PdfReader
 
-        reader = PdfReader(str(pdf_path))
+        if isinstance(source, mmap.mmap):
+            source.seek(0)
+            reader = PdfReader(source)
+        else:
+            reader = PdfReader(str(source))
         return len(reader.pages)
     except ImportError:
         return None
@@ -0,0 +1,523 @@
+"""Remote compilation over a simple TCP protocol.
+
+Wire protocol:
+    Every message is a frame: a 4-byte big-endian length followed by a
+    UTF-8 JSON object of that many bytes. A connection carries any number
+    of request/response pairs in sequence, so clients can keep it open.
+
+    Request:  {"latex_source": str, "engine": str,
+               "timeout_seconds": float, "extra_args": [str, ...]}
+    Response: {"status": "ok", "pages": int}
+              {"status": "compilation_error", "message": str,
+               "latex_log": str, "return_code": int}
+              {"status": "timeout", "timeout_seconds": float}
+              {"status": "pdf_read_error", "message": str}
+              {"status": "worker_error", "message": str}
+
+Compilation, timeout and PDF read errors are properties of the document
+and are raised to the caller unchanged. Connection failures and
+worker_error responses are properties of the node, so the job is retried
+on another node.
+
+The protocol has no authentication or encryption. Workers only accept
+extra_args from a whitelist configured on the worker and clamp
+timeout_seconds to their own maximum, but anyone who can connect can
+still make them compile arbitrary documents. Bind workers to trusted
+networks only.
+"""
+
+import argparse
+import json
+import socket
+import socketserver
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+from page_predictor.config import CompilationConfig, LatexEngine
+from page_predictor.errors import (
+    LatexCompilationError,
+    LatexTimeoutError,
+    PdfReadError,
+    WorkerUnavailableError,
+)
+from page_predictor.executor import Executor, LocalExecutor, PoolExecutor
+
+_HEADER = struct.Struct(">I")
+
+# Upper bound on a single frame, to reject garbage length prefixes
+_MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Default upper bound a worker applies to a job's timeout_seconds
+_DEFAULT_MAX_TIMEOUT_SECONDS = 120.0
+
+
+def send_frame(sock: socket.socket, message: dict[str, Any]) -> None:
+    """Send one length-prefixed JSON frame."""
+    body = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def recv_frame(sock: socket.socket) -> Optional[dict[str, Any]]:
+    """Receive one frame, or None if the peer closed the connection cleanly.
+
+    Raises:
+        ConnectionError: If the stream ends mid-frame or is malformed.
+    """
+    header = _recv_exactly(sock, _HEADER.size, allow_eof=True)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > _MAX_FRAME_BYTES:
+        raise ConnectionError(f"Frame of {length} bytes exceeds limit")
+    body = _recv_exactly(sock, length, allow_eof=False)
+    try:
+        message = json.loads(body.decode("utf-8"))
+    except ValueError as e:
+        raise ConnectionError(f"Malformed frame: {e}") from e
+    if not isinstance(message, dict):
+        raise ConnectionError("Malformed frame: expected a JSON object")
+    return message
+
+
+def _recv_exactly(sock: socket.socket, size: int, allow_eof: bool) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            if allow_eof and not buf:
+                return None
+            raise ConnectionError("Connection closed mid-frame")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _encode_request(latex_source: str, config: CompilationConfig) -> dict[str, Any]:
+    return {
+        "latex_source": latex_source,
+        "engine": config.engine.value,
+        "timeout_seconds": config.timeout_seconds,
+        "extra_args": list(config.extra_args),
+    }
+
+
+def _decode_request(
+    message: dict[str, Any],
+    allowed_extra_args: frozenset[str],
+    max_timeout_seconds: float,
+) -> tuple[str, CompilationConfig]:
+    """Validate an untrusted request against the worker's policy.
+
+    Raises:
+        ValueError: If a field has the wrong type or an extra argument is
+            not in the worker's whitelist.
+    """
+    latex_source = message.get("latex_source")
+    if not isinstance(latex_source, str):
+        raise ValueError("latex_source must be a string")
+
+    engine = message.get("engine")
+    if not isinstance(engine, str):
+        raise ValueError("engine must be a string")
+
+    timeout = message.get("timeout_seconds")
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+        raise ValueError("timeout_seconds must be a number")
+    if not timeout > 0:
+        raise ValueError("timeout_seconds must be positive")
+
+    extra_args = message.get("extra_args", [])
+    if not isinstance(extra_args, list) or not all(
+        isinstance(arg, str) for arg in extra_args
+    ):
+        raise ValueError("extra_args must be a list of strings")
+    rejected = [arg for arg in extra_args if arg not in allowed_extra_args]
+    if rejected:
+        raise ValueError(f"extra_args not allowed by this worker: {rejected}")
+
+    config = CompilationConfig(
+        engine=LatexEngine(engine),
+        timeout_seconds=min(float(timeout), max_timeout_seconds),
+        extra_args=tuple(extra_args),
+    )
+    return latex_source, config
+
+
+# ──────────────────────────────────────────────────────────────
+# Client
+# ──────────────────────────────────────────────────────────────
+
+
+@dataclass
+class _Node:
+    address: tuple[str, int]
+    in_flight: int = 0
+    idle: list[socket.socket] = field(default_factory=list)
+
+
+class _NodeFailure(Exception):
+    """A node could not complete a job; the job may be retried elsewhere."""
+
+
+class RemoteExecutor:
+    """Dispatch compile jobs to remote workers over TCP.
+
+    Each job goes to the node with the fewest jobs in flight from this
+    executor. Connections are kept open and reused per node. If a node
+    cannot be reached or reports an internal failure, the job is retried
+    on the next least-loaded node it has not tried yet.
+
+    Args:
+        workers: Worker addresses as (host, port) tuples or "host:port".
+        connect_timeout: Seconds to wait when opening a connection.
+        io_grace_seconds: Extra seconds allowed for a response beyond the
+            job's own compilation timeout.
+        max_idle_per_node: Idle connections kept open per node.
+    """
+
+    def __init__(
+        self,
+        workers: Sequence[tuple[str, int] | str],
+        connect_timeout: float = 5.0,
+        io_grace_seconds: float = 10.0,
+        max_idle_per_node: int = 4,
+    ):
+        if not workers:
+            raise ValueError("RemoteExecutor requires at least one worker")
+        self._nodes = [_Node(_parse_address(w)) for w in workers]
+        self.connect_timeout = connect_timeout
+        self.io_grace_seconds = io_grace_seconds
+        self.max_idle_per_node = max_idle_per_node
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def execute(self, latex_source: str, config: CompilationConfig) -> int:
+        request = _encode_request(latex_source, config)
+        io_timeout = config.timeout_seconds + self.io_grace_seconds
+        tried: set[int] = set()
+        failures: list[str] = []
+
+        while len(tried) < len(self._nodes):
+            index = self._reserve_node(tried)
+            tried.add(index)
+            node = self._nodes[index]
+            try:
+                response = self._roundtrip(node, request, io_timeout)
+                return _decode_response(response)
+            except _NodeFailure as e:
+                failures.append(f"{_format_address(node.address)}: {e}")
+            finally:
+                with self._lock:
+                    node.in_flight -= 1
+
+        raise WorkerUnavailableError(
+            "No compile worker could complete the job (" + "; ".join(failures) + ")"
+        )
+
+    def close(self) -> None:
+        """Close all pooled connections.
+
+        Jobs still in flight finish, but their connections are closed
+        instead of being returned to the pool.
+        """
+        with self._lock:
+            self._closed = True
+            sockets = [s for node in self._nodes for s in node.idle]
+            for node in self._nodes:
+                node.idle.clear()
+        for sock in sockets:
+            sock.close()
+
+    def __enter__(self) -> "RemoteExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _reserve_node(self, exclude: set[int]) -> int:
+        """Pick the least-loaded untried node and count the job against it."""
+        with self._lock:
+            index = min(
+                (i for i in range(len(self._nodes)) if i not in exclude),
+                key=lambda i: self._nodes[i].in_flight,
+            )
+            self._nodes[index].in_flight += 1
+            return index
+
+    def _roundtrip(
+        self, node: _Node, request: dict[str, Any], io_timeout: float
+    ) -> dict[str, Any]:
+        with self._lock:
+            sock = node.idle.pop() if node.idle else None
+
+        if sock is not None:
+            try:
+                return self._exchange(node, sock, request, io_timeout)
+            except TimeoutError as e:
+                sock.close()
+                raise _NodeFailure("timed out waiting for response") from e
+            except OSError:
+                # A pooled connection may have gone stale while idle;
+                # give the node one chance on a fresh connection.
+                sock.close()
+
+        try:
+            sock = socket.create_connection(node.address, timeout=self.connect_timeout)
+        except OSError as e:
+            raise _NodeFailure(f"connect failed: {e}") from e
+        try:
+            return self._exchange(node, sock, request, io_timeout)
+        except OSError as e:
+            sock.close()
+            raise _NodeFailure(str(e) or type(e).__name__) from e
+
+    def _exchange(
+        self,
+        node: _Node,
+        sock: socket.socket,
+        request: dict[str, Any],
+        io_timeout: float,
+    ) -> dict[str, Any]:
+        sock.settimeout(io_timeout)
+        send_frame(sock, request)
+        response = recv_frame(sock)
+        if response is None:
+            raise ConnectionError("Worker closed the connection")
+        self._release(node, sock)
+        if response.get("status") == "worker_error":
+            raise _NodeFailure(response.get("message", "worker error"))
+        return response
+
+    def _release(self, node: _Node, sock: socket.socket) -> None:
+        with self._lock:
+            if not self._closed and len(node.idle) < self.max_idle_per_node:
+                node.idle.append(sock)
+                return
+        sock.close()
+
+
+def _decode_response(response: dict[str, Any]) -> int:
+    """Turn a worker reply into a page count or a document error.
+
+    Replies with missing or mistyped fields come from a buggy or
+    incompatible worker, so they are node failures like worker_error.
+    """
+    status = response.get("status")
+    if status == "ok":
+        pages = response.get("pages")
+        if type(pages) is not int or pages < 0:
+            raise _NodeFailure(f"malformed 'ok' reply: pages={pages!r}")
+        return pages
+    if status == "compilation_error":
+        message = response.get("message", "LaTeX compilation failed")
+        latex_log = response.get("latex_log", "")
+        return_code = response.get("return_code", -1)
+        if not (
+            isinstance(message, str)
+            and isinstance(latex_log, str)
+            and type(return_code) is int
+        ):
+            raise _NodeFailure("malformed 'compilation_error' reply")
+        raise LatexCompilationError(message, latex_log, return_code)
+    if status == "timeout":
+        timeout = response.get("timeout_seconds")
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+            raise _NodeFailure(
+                f"malformed 'timeout' reply: timeout_seconds={timeout!r}"
+            )
+        raise LatexTimeoutError(timeout)
+    if status == "pdf_read_error":
+        message = response.get("message", "Could not determine page count")
+        if not isinstance(message, str):
+            raise _NodeFailure("malformed 'pdf_read_error' reply")
+        raise PdfReadError(message)
+    raise _NodeFailure(f"unexpected response status {status!r}")
+
+
+def _parse_address(worker: tuple[str, int] | str) -> tuple[str, int]:
+    if isinstance(worker, str):
+        host, sep, port = worker.rpartition(":")
+        if not sep or not host:
+            raise ValueError(f"Worker address must be 'host:port', got {worker!r}")
+        return host.strip("[]"), int(port)
+    host, port = worker
+    return host, int(port)
+
+
+def _format_address(address: tuple[str, int]) -> str:
+    return f"{address[0]}:{address[1]}"
+
+
+# ──────────────────────────────────────────────────────────────
+# Worker
+# ──────────────────────────────────────────────────────────────
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    server: "_WorkerServer"
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except OSError:
+                return
+            if request is None:
+                return
+            response = _run_job(self.server, request)
+            try:
+                send_frame(self.request, response)
+            except OSError:
+                return
+
+
+class _WorkerServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        executor: Executor,
+        allowed_extra_args: frozenset[str],
+        max_timeout_seconds: float,
+    ):
+        self.executor = executor
+        self.allowed_extra_args = allowed_extra_args
+        self.max_timeout_seconds = max_timeout_seconds
+        super().__init__(address, _WorkerHandler)
+
+
+def _run_job(server: _WorkerServer, request: dict[str, Any]) -> dict[str, Any]:
+    try:
+        latex_source, config = _decode_request(
+            request, server.allowed_extra_args, server.max_timeout_seconds
+        )
+    except ValueError as e:
+        return {"status": "worker_error", "message": f"Bad request: {e}"}
+    try:
+        pages = server.executor.execute(latex_source, config)
+    except LatexCompilationError as e:
+        return {
+            "status": "compilation_error",
+            "message": str(e),
+            "latex_log": e.latex_log,
+            "return_code": e.return_code,
+        }
+    except LatexTimeoutError as e:
+        return {"status": "timeout", "timeout_seconds": e.timeout_seconds}
+    except PdfReadError as e:
+        return {"status": "pdf_read_error", "message": str(e)}
+    except Exception as e:
+        # e.g. the TeX engine is not installed on this node
+        return {"status": "worker_error", "message": f"{type(e).__name__}: {e}"}
+    return {"status": "ok", "pages": pages}
+
+
+class CompileWorker:
+    """TCP server that compiles jobs sent by a RemoteExecutor.
+
+    Each client connection is served on its own thread and compiled with
+    the given executor (LocalExecutor by default). Requests are untrusted:
+    extra TeX arguments are rejected unless whitelisted here, and job
+    timeouts are clamped to max_timeout_seconds.
+
+    Args:
+        host: Interface to bind.
+        port: Port to bind; 0 picks a free port (see ``address``).
+        executor: Backend that performs the compilation on this node.
+        allowed_extra_args: Exact extra TeX arguments clients may send.
+        max_timeout_seconds: Upper bound on a job's compilation timeout.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        executor: Executor | None = None,
+        allowed_extra_args: Sequence[str] = (),
+        max_timeout_seconds: float = _DEFAULT_MAX_TIMEOUT_SECONDS,
+    ):
+        self._server = _WorkerServer(
+            (host, port),
+            executor or LocalExecutor(),
+            frozenset(allowed_extra_args),
+            max_timeout_seconds,
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The bound (host, port)."""
+        host, port = self._server.server_address[:2]
+        return host, port
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until close() is called."""
+        self._server.serve_forever()
+
+    def start(self) -> None:
+        """Serve requests on a background daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop serving and release the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "CompileWorker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run a compile worker: ``python -m page_predictor.remote``."""
+    parser = argparse.ArgumentParser(description="Run a LaTeX compile worker.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Compile in a local process pool of this size",
+    )
+    parser.add_argument(
+        "--allow-arg",
+        action="append",
+        default=[],
+        metavar="ARG",
+        help="Extra TeX argument clients may send (repeatable, exact match)",
+    )
+    parser.add_argument(
+        "--max-timeout",
+        type=float,
+        default=_DEFAULT_MAX_TIMEOUT_SECONDS,
+        help="Upper bound on a job's compilation timeout in seconds",
+    )
+    args = parser.parse_args(argv)
+
+    executor = PoolExecutor(args.processes) if args.processes else LocalExecutor()
+    worker = CompileWorker(
+        args.host, args.port, executor, args.allow_arg, args.max_timeout
+    )
+    host, port = worker.address
+    print(f"page_predictor worker listening on {host}:{port}", flush=True)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+        if isinstance(executor, PoolExecutor):
+            executor.close()
+
+
+if __name__ == "__main__":
+    main()
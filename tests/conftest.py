@@ -1,3 +1,5 @@
+import random
+
 import pytest
 
 
@@ -61,3 +63,86 @@ jane@example.com \textbar{} (555) 123-4567
 Python, Go, Rust, PostgreSQL, Redis, Docker, Kubernetes, AWS
 \end{document}
 """
+
+
+@pytest.fixture
+def write_pdf():
+    """Factory that writes a skeletal, uncompressed PDF to a path.
+
+    The page tree reports ``pages`` pages unless ``pages_dict`` replaces
+    its dictionary outright. ``update_count`` appends an incremental
+    update that redefines the page tree with that /Count.
+    ``stream_bytes`` adds a binary stream object of that size before the
+    page tree. With ``xref=False`` the cross-reference tables and
+    startxref are left out, so readers have to search for objects.
+    """
+
+    def write(
+        path,
+        pages=1,
+        pages_dict=None,
+        update_count=None,
+        stream_bytes=0,
+        xref=True,
+    ):
+        if pages_dict is None:
+            pages_dict = _page_tree(pages)
+        objects = {1: b"<< /Type /Catalog /Pages 2 0 R /Outlines 3 0 R >>"}
+        if stream_bytes:
+            payload = random.Random(0).randbytes(stream_bytes)
+            objects[4] = (
+                b"<< /Length %d >>\nstream\n" % stream_bytes
+                + payload
+                + b"\nendstream"
+            )
+        objects[2] = pages_dict
+        objects[3] = b"<< /Type /Outlines /Count 7 >>"
+        for i in range(pages):
+            objects[_FIRST_PAGE + i] = (
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 100 100] >>"
+            )
+
+        data = bytearray(b"%PDF-1.4\n")
+        size = max(objects) + 1
+        prev = _write_revision(data, objects, size, xref, prev=None)
+        if update_count is not None:
+            update = {2: _page_tree(update_count)}
+            _write_revision(data, update, size, xref, prev=prev)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(bytes(data))
+        return path
+
+    return write
+
+
+# Object number of the first page object written by write_pdf
+_FIRST_PAGE = 5
+
+
+def _page_tree(pages):
+    kids = b" ".join(b"%d 0 R" % (_FIRST_PAGE + i) for i in range(pages))
+    return b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+
+def _write_revision(data, objects, size, xref, prev):
+    """Append objects plus their cross-reference table and trailer."""
+    offsets = {}
+    for number, body in objects.items():
+        offsets[number] = len(data)
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    trailer = b"/Size %d /Root 1 0 R" % size
+    if not xref:
+        data += b"trailer\n<< " + trailer + b" >>\n%%EOF\n"
+        return None
+
+    xref_offset = len(data)
+    data += b"xref\n"
+    if prev is None:
+        data += b"0 1\n0000000000 65535 f \n"
+    for number in sorted(offsets):
+        data += b"%d 1\n%010d 00000 n \n" % (number, offsets[number])
+    if prev is not None:
+        trailer += b" /Prev %d" % prev
+    data += b"trailer\n<< " + trailer + b" >>\nstartxref\n%d\n" % xref_offset
+    data += b"%%EOF\n"
+    return xref_offset
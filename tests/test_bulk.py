@@ -0,0 +1,218 @@
+"""Tests for bulk page counting of existing PDFs."""
+
+import errno
+import os
+
+import pytest
+
+from page_predictor.bulk import (
+    PageIndex,
+    count_pdf_pages_bulk,
+    iter_pdf_files,
+    main,
+    read_manifest,
+)
+
+
+@pytest.fixture
+def pdf_tree(tmp_path, write_pdf):
+    root = tmp_path / "pdfs"
+    write_pdf(root / "one.pdf", 1)
+    write_pdf(root / "nested" / "two.PDF", 2)
+    write_pdf(root / "nested" / "deeper" / "three.pdf", 3)
+    (root / "notes.txt").write_text("not a pdf")
+    (root / "broken.pdf").write_bytes(b"garbage")
+    return root
+
+
+def _by_name(results):
+    return {r.path.name: r for r in results}
+
+
+@pytest.fixture
+def unreadable(monkeypatch):
+    """Make scandir fail with EACCES for the given directory.
+
+    Patched rather than chmod-ed so the test also holds when run as root.
+    """
+    real_scandir = os.scandir
+
+    def block(directory):
+        def scandir(path):
+            if os.path.abspath(path) == os.path.abspath(directory):
+                raise PermissionError(errno.EACCES, "Permission denied", str(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", scandir)
+
+    return block
+
+
+class TestIterPdfFiles:
+    def test_walks_tree(self, pdf_tree):
+        names = {p.name for p in iter_pdf_files(pdf_tree)}
+        assert names == {"one.pdf", "two.PDF", "three.pdf", "broken.pdf"}
+
+    def test_unreadable_directory_reported(self, pdf_tree, unreadable):
+        unreadable(pdf_tree / "nested")
+        errors = []
+        names = {p.name for p in iter_pdf_files(pdf_tree, errors.append)}
+        assert names == {"one.pdf", "broken.pdf"}
+        assert [e.filename for e in errors] == [str(pdf_tree / "nested")]
+
+
+class TestReadManifest:
+    def test_relative_to_manifest(self, tmp_path):
+        manifest = tmp_path / "list.txt"
+        manifest.write_text("# comment\n\na.pdf\n/abs/b.pdf\n")
+        assert list(read_manifest(manifest)) == [
+            tmp_path / "a.pdf",
+            tmp_path / "/abs/b.pdf",
+        ]
+
+
+class TestCountPdfPagesBulk:
+    def test_counts_and_errors(self, pdf_tree):
+        paths = iter_pdf_files(pdf_tree)
+        results = _by_name(count_pdf_pages_bulk(paths, max_workers=2))
+        assert results["one.pdf"].pages == 1
+        assert results["two.PDF"].pages == 2
+        assert results["three.pdf"].pages == 3
+        assert results["broken.pdf"].pages is None
+        assert results["broken.pdf"].error
+
+    def test_missing_file(self, tmp_path):
+        [result] = count_pdf_pages_bulk([tmp_path / "missing.pdf"])
+        assert result.error.startswith("FileNotFoundError")
+
+    def test_many_files_bounded_window(self, tmp_path, write_pdf):
+        paths = [write_pdf(tmp_path / f"{i}.pdf", i % 5 + 1) for i in range(50)]
+        results = list(count_pdf_pages_bulk(iter(paths), max_workers=2))
+        expected = sorted(i % 5 + 1 for i in range(50))
+        assert sorted(r.pages for r in results) == expected
+
+
+class TestPageIndex:
+    def test_rerun_uses_index(self, pdf_tree, tmp_path):
+        index_path = tmp_path / "index.json"
+        index = PageIndex.load(index_path)
+        first = _by_name(count_pdf_pages_bulk(iter_pdf_files(pdf_tree), index))
+        index.save()
+        assert not any(r.cached for r in first.values())
+
+        index = PageIndex.load(index_path)
+        assert len(index) == 3  # failures are not recorded
+        second = _by_name(count_pdf_pages_bulk(iter_pdf_files(pdf_tree), index))
+        assert second["one.pdf"].cached
+        assert second["one.pdf"].pages == 1
+        assert not second["broken.pdf"].cached
+
+    def test_changed_file_recounted(self, pdf_tree, tmp_path, write_pdf):
+        index = PageIndex(tmp_path / "index.json")
+        list(count_pdf_pages_bulk(iter_pdf_files(pdf_tree), index))
+
+        changed = write_pdf(pdf_tree / "one.pdf", 12)
+        stat = changed.stat()
+        os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        [result] = count_pdf_pages_bulk([changed], index)
+        assert result.pages == 12
+        assert not result.cached
+
+    def test_checkpoint_saves_during_run(self, tmp_path, write_pdf):
+        paths = [write_pdf(tmp_path / "pdfs" / f"{i}.pdf", 1) for i in range(5)]
+        index_path = tmp_path / "index.json"
+        index = PageIndex(index_path, checkpoint_every=2)
+        list(count_pdf_pages_bulk(paths, index))
+        # Checkpointed without an explicit save(); at most one record is
+        # still below the threshold
+        assert len(PageIndex.load(index_path)) >= 4
+
+    def test_failed_checkpoint_does_not_abort_run(self, tmp_path, write_pdf):
+        paths = [write_pdf(tmp_path / "pdfs" / f"{i}.pdf", 1) for i in range(5)]
+        index = PageIndex(tmp_path / "missing_dir" / "index.json", checkpoint_every=2)
+        with pytest.warns(UserWarning, match="Could not checkpoint"):
+            results = list(count_pdf_pages_bulk(paths, index))
+        assert [r.pages for r in results] == [1] * 5
+        assert len(index) == 5
+
+        index.index_path = tmp_path / "index.json"
+        index.save()  # still dirty after the failed checkpoints
+        assert len(PageIndex.load(index.index_path)) == 5
+
+    def test_prune_drops_deleted_files(self, pdf_tree, tmp_path):
+        index_path = tmp_path / "index.json"
+        index = PageIndex(index_path)
+        index.record("/elsewhere/keep.pdf", 1, 1, 1)
+        list(count_pdf_pages_bulk(iter_pdf_files(pdf_tree), index))
+        index.save()
+
+        (pdf_tree / "one.pdf").unlink()
+        index = PageIndex.load(index_path)
+        assert len(index) == 4
+        list(count_pdf_pages_bulk(iter_pdf_files(pdf_tree), index))
+        assert index.prune([pdf_tree]) == 1
+        assert set(index._entries) == {
+            "/elsewhere/keep.pdf",
+            str(pdf_tree / "nested" / "two.PDF"),
+            str(pdf_tree / "nested" / "deeper" / "three.pdf"),
+        }
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            '{"version": 1, "entries": {"/a.pdf": [1, 2',  # truncated
+            "[1, 2, 3]",
+            '{"version": 1, "entries": {"/a.pdf": "bad"}}',
+            '{"version": 99, "entries": {}}',
+        ],
+    )
+    def test_unusable_index_starts_empty(self, tmp_path, content):
+        index_path = tmp_path / "index.json"
+        index_path.write_text(content)
+        with pytest.warns(UserWarning, match="page index"):
+            index = PageIndex.load(index_path)
+        assert len(index) == 0
+
+
+class TestMain:
+    def test_streams_results(self, pdf_tree, tmp_path, capsys):
+        index_path = tmp_path / "index.json"
+        assert main([str(pdf_tree), "--index", str(index_path)]) == 1
+        out, err = capsys.readouterr()
+        assert f"{pdf_tree / 'one.pdf'}\t1" in out.splitlines()
+        assert "broken.pdf" in err
+        assert index_path.exists()
+
+    def test_corrupt_index_recovered(self, pdf_tree, tmp_path, capsys):
+        index_path = tmp_path / "index.json"
+        index_path.write_text('{"version": 1, "entr')
+        with pytest.warns(UserWarning):
+            assert main([str(pdf_tree), "--index", str(index_path)]) == 1
+        assert len(PageIndex.load(index_path)) == 3
+
+    def test_full_tree_run_prunes_index(self, pdf_tree, tmp_path, capsys):
+        index_path = tmp_path / "index.json"
+        main([str(pdf_tree), "--index", str(index_path)])
+        (pdf_tree / "nested" / "two.PDF").unlink()
+        main([str(pdf_tree), "--index", str(index_path)])
+        assert len(PageIndex.load(index_path)) == 2
+
+    def test_unreadable_subdirectory_not_pruned(
+        self, pdf_tree, tmp_path, capsys, unreadable
+    ):
+        index_path = tmp_path / "index.json"
+        main([str(pdf_tree), "--index", str(index_path)])
+        assert len(PageIndex.load(index_path)) == 3
+
+        unreadable(pdf_tree / "nested")
+        assert main([str(pdf_tree), "--index", str(index_path)]) == 1
+        _, err = capsys.readouterr()
+        assert "PermissionError" in err
+        assert len(PageIndex.load(index_path)) == 3
+
+    def test_manifest(self, pdf_tree, tmp_path, capsys):
+        manifest = tmp_path / "list.txt"
+        manifest.write_text("pdfs/one.pdf\npdfs/nested/deeper/three.pdf\n")
+        assert main(["--manifest", str(manifest)]) == 0
+        out, _ = capsys.readouterr()
+        assert len(out.splitlines()) == 2
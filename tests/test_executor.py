@@ -0,0 +1,56 @@
+"""Tests for the local executor backends."""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from page_predictor import count_pages
+from page_predictor.errors import LatexCompilationError, LatexTimeoutError
+from page_predictor.executor import LocalExecutor, PoolExecutor
+
+
+class TestErrorPickling:
+    """Errors must cross process pool boundaries intact."""
+
+    def test_timeout_error(self):
+        err = pickle.loads(pickle.dumps(LatexTimeoutError(2.5)))
+        assert err.timeout_seconds == 2.5
+        assert str(err) == "LaTeX compilation timed out after 2.5 seconds"
+
+    def test_compilation_error(self):
+        err = pickle.loads(pickle.dumps(LatexCompilationError("boom", "log", 1)))
+        assert str(err) == "boom"
+        assert err.latex_log == "log"
+        assert err.return_code == 1
+
+
+class TestLocalExecutor:
+    def test_single_page(self, minimal_latex):
+        assert count_pages(minimal_latex, executor=LocalExecutor()) == 1
+
+
+class TestPoolExecutor:
+    def test_two_pages(self, two_page_latex):
+        with PoolExecutor(max_workers=2) as executor:
+            assert count_pages(two_page_latex, executor=executor) == 2
+
+    def test_compilation_error(self, invalid_latex):
+        with PoolExecutor(max_workers=1) as executor:
+            with pytest.raises(LatexCompilationError) as exc_info:
+                count_pages(invalid_latex, executor=executor)
+        assert exc_info.value.latex_log
+
+    def test_broken_pool_replaced(self, minimal_latex):
+        with PoolExecutor(max_workers=1) as executor:
+            pool = ProcessPoolExecutor(max_workers=1)
+            pool.submit(int).result()  # start the worker process
+            for process in list(pool._processes.values()):
+                process.kill()
+                process.join()
+            executor._pool = pool
+
+            with pytest.raises(BrokenProcessPool):
+                count_pages(minimal_latex, executor=executor)
+            assert executor._pool is None
@@ -1,12 +1,18 @@
 """Unit tests for PDF page count extraction strategies."""
 
+import mmap
+import struct
+import time
+
 import pytest
 
+from page_predictor import pdf_reader
 from page_predictor.errors import PdfReadError
 from page_predictor.pdf_reader import (
     _count_from_log,
     _count_from_pdf_binary,
     count_pdf_pages,
+    quick_count_pdf_pages,
 )
 
 
@@ -41,3 +47,117 @@ class TestCountPdfPages:
         fake_pdf.write_bytes(b"not a pdf")
         with pytest.raises(PdfReadError):
             count_pdf_pages(fake_pdf)
+
+
+class TestBinaryPageTree:
+    def test_count_after_type(self, tmp_path, write_pdf):
+        pdf = write_pdf(tmp_path / "a.pdf", pages=3)
+        assert _count_from_pdf_binary(pdf) == 3
+
+    def test_count_before_type(self, tmp_path, write_pdf):
+        """/Count must come from the page tree, not the next object."""
+        pdf = write_pdf(
+            tmp_path / "a.pdf", pages_dict=b"<< /Count 2 /Kids [] /Type /Pages >>"
+        )
+        assert _count_from_pdf_binary(pdf) == 2
+
+    def test_incremental_update(self, tmp_path, write_pdf):
+        """The last revision of the page tree wins over stale ones."""
+        pdf = write_pdf(tmp_path / "a.pdf", pages=3, update_count=1)
+        assert _count_from_pdf_binary(pdf) == 1
+        assert quick_count_pdf_pages(pdf) == 1
+        assert count_pdf_pages(pdf) == 1
+
+    def test_uses_xref_table(self, tmp_path, write_pdf, monkeypatch):
+        """Objects are located through the tables, not by searching."""
+
+        def fail(data, number):
+            raise AssertionError(f"searched the file for object {number}")
+
+        monkeypatch.setattr(pdf_reader, "_rfind_object_header", fail)
+        pdf = write_pdf(tmp_path / "a.pdf", pages=3, update_count=2)
+        assert _count_from_pdf_binary(pdf) == 2
+
+    def test_without_xref_table(self, tmp_path, write_pdf):
+        pdf = write_pdf(tmp_path / "a.pdf", pages=3, update_count=2, xref=False)
+        assert _count_from_pdf_binary(pdf) == 2
+
+    def test_large_stream_bounded_time(self, tmp_path, write_pdf):
+        """Cost must not grow with the size of the file."""
+        pdf = write_pdf(tmp_path / "big.pdf", pages=2, stream_bytes=32 * 1024 * 1024)
+        start = time.perf_counter()
+        assert quick_count_pdf_pages(pdf) == 2
+        assert _count_from_pdf_binary(pdf) == 2
+        assert time.perf_counter() - start < 0.5
+
+    def test_no_trailer(self, tmp_path):
+        pdf = tmp_path / "a.pdf"
+        pdf.write_bytes(b"%PDF-1.4\n1 0 obj\n<< /Type /Pages /Count 3 >>\nendobj\n")
+        assert _count_from_pdf_binary(pdf) is None
+
+    def test_empty_file(self, tmp_path):
+        pdf = tmp_path / "empty.pdf"
+        pdf.write_bytes(b"")
+        assert _count_from_pdf_binary(pdf) is None
+
+
+def _xref_stream_pdf(path):
+    """A two-page PDF whose cross-reference section is a stream (PDF 1.5)."""
+    bodies = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 100 100] >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 100 100] >>",
+    ]
+    data = bytearray(b"%PDF-1.5\n")
+    offsets = []
+    for number, body in enumerate(bodies, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(data)
+    offsets.append(xref_offset)
+    entries = struct.pack(">BIB", 0, 0, 255) + b"".join(
+        struct.pack(">BIB", 1, offset, 0) for offset in offsets
+    )
+    data += (
+        b"5 0 obj\n<< /Type /XRef /Size 6 /W [1 4 1] /Root 1 0 R /Length %d >>\n"
+        b"stream\n" % len(entries)
+    )
+    data += entries + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+    path.write_bytes(bytes(data))
+    return path
+
+
+class TestXrefStream:
+    def test_raw_scan_skipped(self, tmp_path):
+        assert _count_from_pdf_binary(_xref_stream_pdf(tmp_path / "a.pdf")) is None
+
+    def test_quick_count_uses_pypdf(self, tmp_path):
+        pytest.importorskip("pypdf")
+        assert quick_count_pdf_pages(_xref_stream_pdf(tmp_path / "a.pdf")) == 2
+
+    def test_pypdf_reads_mapped_file(self, tmp_path, monkeypatch):
+        pypdf = pytest.importorskip("pypdf")
+        sources = []
+        real_reader = pypdf.PdfReader
+
+        def spy(source, *args, **kwargs):
+            sources.append(source)
+            return real_reader(source, *args, **kwargs)
+
+        monkeypatch.setattr(pypdf, "PdfReader", spy)
+        quick_count_pdf_pages(_xref_stream_pdf(tmp_path / "a.pdf"))
+        assert len(sources) == 1
+        assert isinstance(sources[0], mmap.mmap)
+
+
+class TestQuickCount:
+    def test_binary_strategy(self, tmp_path, write_pdf):
+        pdf = write_pdf(tmp_path / "a.pdf", pages=4)
+        assert quick_count_pdf_pages(pdf) == 4
+
+    def test_unreadable(self, tmp_path):
+        fake = tmp_path / "fake.pdf"
+        fake.write_bytes(b"not a pdf")
+        with pytest.raises(PdfReadError):
+            quick_count_pdf_pages(fake)
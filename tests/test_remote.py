@@ -0,0 +1,300 @@
+"""Tests for the remote TCP executor, using localhost workers."""
+
+import contextlib
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from page_predictor import CompilationConfig, count_pages
+from page_predictor.errors import (
+    LatexCompilationError,
+    LatexTimeoutError,
+    PdfReadError,
+    WorkerUnavailableError,
+)
+from page_predictor.remote import CompileWorker, RemoteExecutor, recv_frame, send_frame
+
+
+class FakeExecutor:
+    """Counts \\newpage markers instead of running TeX."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.calls = 0
+        self.gate = gate
+
+    def execute(self, latex_source, config):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        if "\\undefinedcommand" in latex_source:
+            raise LatexCompilationError("! Undefined control sequence.", "log", 1)
+        if "\\loop" in latex_source:
+            raise LatexTimeoutError(config.timeout_seconds)
+        if "\\nopdf" in latex_source:
+            raise PdfReadError("no pages")
+        if "\\crash" in latex_source:
+            raise FileNotFoundError("pdflatex")
+        return latex_source.count("\\newpage") + 1
+
+
+@pytest.fixture
+def workers():
+    started = []
+
+    def start(executor=None, **kwargs):
+        worker = CompileWorker(executor=executor or FakeExecutor(), **kwargs)
+        worker.start()
+        started.append(worker)
+        return worker
+
+    yield start
+    for worker in started:
+        worker.close()
+
+
+def _dead_address():
+    """An address on localhost that refuses connections."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()
+
+
+class TestFraming:
+    def test_roundtrip(self):
+        a, b = socket.socketpair()
+        with a, b:
+            send_frame(a, {"pages": 3})
+            assert recv_frame(b) == {"pages": 3}
+
+    def test_clean_eof(self):
+        a, b = socket.socketpair()
+        with b:
+            a.close()
+            assert recv_frame(b) is None
+
+    def test_truncated_frame(self):
+        a, b = socket.socketpair()
+        with b:
+            a.sendall(b"\x00\x00\x00\x10{}")
+            a.close()
+            with pytest.raises(ConnectionError):
+                recv_frame(b)
+
+
+class RecordingExecutor(FakeExecutor):
+    def execute(self, latex_source, config):
+        self.config = config
+        return super().execute(latex_source, config)
+
+
+def _send_raw(worker, request):
+    with socket.create_connection(worker.address, timeout=5) as sock:
+        send_frame(sock, request)
+        return recv_frame(sock)
+
+
+_VALID_REQUEST = {
+    "latex_source": "doc",
+    "engine": "pdflatex",
+    "timeout_seconds": 30.0,
+    "extra_args": [],
+}
+
+
+class TestWorkerValidation:
+    def test_shell_escape_rejected(self, workers):
+        executor = FakeExecutor()
+        worker = workers(executor)
+        response = _send_raw(worker, {**_VALID_REQUEST, "extra_args": ["-shell-escape"]})
+        assert response["status"] == "worker_error"
+        assert executor.calls == 0
+
+    def test_whitelisted_arg_accepted(self, workers):
+        executor = RecordingExecutor()
+        worker = workers(executor, allowed_extra_args=["-8bit"])
+        response = _send_raw(worker, {**_VALID_REQUEST, "extra_args": ["-8bit"]})
+        assert response == {"status": "ok", "pages": 1}
+        assert executor.config.extra_args == ("-8bit",)
+
+    @pytest.mark.parametrize(
+        "override",
+        [
+            {"extra_args": "-8bit"},
+            {"latex_source": ["doc"]},
+            {"engine": "sh"},
+            {"timeout_seconds": "30"},
+            {"timeout_seconds": -1},
+        ],
+    )
+    def test_malformed_request_rejected(self, workers, override):
+        executor = FakeExecutor()
+        worker = workers(executor, allowed_extra_args=["-8bit"])
+        response = _send_raw(worker, {**_VALID_REQUEST, **override})
+        assert response["status"] == "worker_error"
+        assert executor.calls == 0
+
+    def test_timeout_capped(self, workers):
+        executor = RecordingExecutor()
+        worker = workers(executor, max_timeout_seconds=5.0)
+        response = _send_raw(worker, {**_VALID_REQUEST, "timeout_seconds": 3600})
+        assert response["status"] == "ok"
+        assert executor.config.timeout_seconds == 5.0
+
+
+class TestRemoteExecutor:
+    def test_count_pages(self, workers, two_page_latex):
+        worker = workers()
+        with RemoteExecutor([worker.address]) as executor:
+            assert count_pages(two_page_latex, executor=executor) == 2
+
+    def test_host_port_string(self, workers, minimal_latex):
+        host, port = workers().address
+        with RemoteExecutor([f"{host}:{port}"]) as executor:
+            assert count_pages(minimal_latex, executor=executor) == 1
+
+    def test_compilation_error_propagates(self, workers, invalid_latex):
+        with RemoteExecutor([workers().address]) as executor:
+            with pytest.raises(LatexCompilationError) as exc_info:
+                count_pages(invalid_latex, executor=executor)
+        assert exc_info.value.latex_log == "log"
+        assert exc_info.value.return_code == 1
+
+    def test_document_errors_not_retried(self, workers):
+        first, second = FakeExecutor(), FakeExecutor()
+        addresses = [workers(first).address, workers(second).address]
+        with RemoteExecutor(addresses) as executor:
+            with pytest.raises(LatexTimeoutError) as exc_info:
+                executor.execute("\\loop", CompilationConfig(timeout_seconds=2.5))
+            with pytest.raises(PdfReadError):
+                executor.execute("\\nopdf", CompilationConfig())
+        assert exc_info.value.timeout_seconds == 2.5
+        assert first.calls + second.calls == 2
+
+    def test_failover_to_live_node(self, workers, minimal_latex):
+        live = workers()
+        with RemoteExecutor([_dead_address(), live.address]) as executor:
+            assert count_pages(minimal_latex, executor=executor) == 1
+
+    def test_worker_error_retried_elsewhere(self, workers):
+        class Broken(FakeExecutor):
+            def execute(self, latex_source, config):
+                self.calls += 1
+                raise FileNotFoundError("pdflatex")
+
+        broken, healthy = Broken(), FakeExecutor()
+        addresses = [workers(broken).address, workers(healthy).address]
+        with RemoteExecutor(addresses) as executor:
+            assert executor.execute("doc", CompilationConfig()) == 1
+        assert broken.calls == 1
+        assert healthy.calls == 1
+
+    def test_all_nodes_down(self, minimal_latex):
+        executor = RemoteExecutor([_dead_address(), _dead_address()])
+        with pytest.raises(WorkerUnavailableError):
+            count_pages(minimal_latex, executor=executor)
+
+    def test_connections_reused(self, workers, minimal_latex):
+        worker = workers()
+        with RemoteExecutor([worker.address]) as executor:
+            for _ in range(3):
+                count_pages(minimal_latex, executor=executor)
+            assert len(executor._nodes[0].idle) == 1
+
+    def test_stale_connection_recovered(self, workers, minimal_latex):
+        worker = workers()
+        with RemoteExecutor([worker.address]) as executor:
+            count_pages(minimal_latex, executor=executor)
+            executor._nodes[0].idle[0].close()
+            executor._nodes[0].idle[0] = _closed_peer_socket()
+            assert count_pages(minimal_latex, executor=executor) == 1
+
+    def test_close_during_job_not_pooled(self, workers, minimal_latex):
+        gate = threading.Event()
+        worker = workers(FakeExecutor(gate))
+        executor = RemoteExecutor([worker.address])
+        job = threading.Thread(
+            target=count_pages, args=(minimal_latex,), kwargs={"executor": executor}
+        )
+        job.start()
+        deadline = time.monotonic() + 5
+        while executor._nodes[0].in_flight == 0:
+            assert time.monotonic() < deadline, "job never started"
+            time.sleep(0.01)
+        executor.close()
+        gate.set()
+        job.join()
+        assert executor._nodes[0].idle == []
+
+    def test_least_loaded_dispatch(self, workers, minimal_latex):
+        gate = threading.Event()
+        slow, fast = FakeExecutor(gate), FakeExecutor()
+        addresses = [workers(slow).address, workers(fast).address]
+        with RemoteExecutor(addresses) as executor:
+            blocked = threading.Thread(
+                target=count_pages, args=(minimal_latex,), kwargs={"executor": executor}
+            )
+            blocked.start()
+            deadline = time.monotonic() + 5
+            while executor._nodes[0].in_flight == 0:
+                assert time.monotonic() < deadline, "job never reached the slow node"
+                time.sleep(0.01)
+            for _ in range(3):
+                count_pages(minimal_latex, executor=executor)
+            gate.set()
+            blocked.join()
+        assert slow.calls == 1
+        assert fast.calls == 3
+
+
+class TestMalformedReplies:
+    @pytest.mark.parametrize(
+        "reply",
+        [
+            {"status": "ok"},
+            {"status": "ok", "pages": None},
+            {"status": "ok", "pages": "2"},
+            {"status": "timeout"},
+            {"status": "compilation_error", "return_code": "1"},
+            {"status": "pdf_read_error", "message": 3},
+            {"status": "bogus"},
+        ],
+    )
+    def test_retried_on_another_node(self, workers, minimal_latex, reply):
+        with _canned_worker(reply) as bad:
+            with RemoteExecutor([bad, workers().address]) as executor:
+                assert count_pages(minimal_latex, executor=executor) == 1
+
+    def test_only_node_malformed(self, minimal_latex):
+        with _canned_worker({"status": "ok"}) as bad:
+            with pytest.raises(WorkerUnavailableError, match="malformed"):
+                count_pages(minimal_latex, executor=RemoteExecutor([bad]))
+
+
+@contextlib.contextmanager
+def _canned_worker(reply):
+    """A worker that answers every request with the same reply."""
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            while recv_frame(self.request) is not None:
+                send_frame(self.request, reply)
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _closed_peer_socket():
+    """A connected socket whose peer has already hung up."""
+    a, b = socket.socketpair()
+    b.close()
+    return a